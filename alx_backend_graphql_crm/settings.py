@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'crm.middleware.DataLoaderMiddleware',
 ]
 
 ROOT_URLCONF = 'alx_backend_graphql_crm.urls'
@@ -132,7 +133,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # GraphQL configuration
 GRAPHENE = {
-    "SCHEMA": "schema.schema"
+    "SCHEMA": "alx_backend_graphql_crm.schema.schema"
 }
 
 # Django Crontab Configuration
@@ -146,4 +147,10 @@ CRONJOBS = [
 
 # Optional: Configure cron job behavior
 CRONTAB_LOCK_JOBS = True  # Prevents overlapping job execution
-CRONTAB_COMMAND_PREFIX = ''  # Custom prefix for cron commands
\ No newline at end of file
+CRONTAB_COMMAND_PREFIX = ''  # Custom prefix for cron commands
+
+# Heartbeat checks the schema in-process; set True to go through the HTTP endpoint
+CRM_HEALTHCHECK_OVER_HTTP = False
+
+# On PostgreSQL, insert CreateOrder's order and product links in one statement
+CRM_SINGLE_STATEMENT_ORDER_INSERT = False
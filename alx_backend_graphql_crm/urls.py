@@ -18,9 +18,13 @@ from django.contrib import admin
 from django.urls import path
 from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from graphql_sync_dataloaders import DeferredExecutionContext
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql', csrf_exempt(GraphQLView.as_view(
+        graphiql=True,
+        execution_context_class=DeferredExecutionContext,
+    ))),
 ]
 
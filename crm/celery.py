@@ -35,6 +35,9 @@ def debug_task(self):
 # Optional: Task routing configuration
 app.conf.task_routes = {
     'crm.tasks.generate_crm_report': {'queue': 'reports'},
+    # File I/O only; served by a thread-pool worker so the default pool's
+    # slots aren't held while the log is scanned and rewritten
+    'crm.tasks.cleanup_old_reports': {'queue': 'io_cleanup'},
     'crm.tasks.*': {'queue': 'default'},
 }
 
@@ -51,6 +54,11 @@ app.conf.task_queues = {
         'exchange_type': 'direct',
         'routing_key': 'reports',
     },
+    'io_cleanup': {
+        'exchange': 'io_cleanup',
+        'exchange_type': 'direct',
+        'routing_key': 'io_cleanup',
+    },
 }
 
 # Health check configuration
@@ -1,8 +1,73 @@
 import os
-import json
+import time
 import requests
-from datetime import datetime
+from collections import deque
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from graphql import execute_sync, parse, validate
+from alx_backend_graphql_crm.schema import schema
+from crm.logging_setup import heartbeat_logger, start_log_listener
+
+
+# Log timestamp format: DD/MM/YYYY-HH:MM:SS
+TS_FMT = "%d/%m/%Y-%H:%M:%S"
+
+GRAPHQL_URL = getattr(settings, 'GRAPHQL_URL', 'http://localhost:8000/graphql')
+
+HELLO_QUERY = """
+query {
+    hello
+}
+"""
+HELLO_PAYLOAD = {'query': HELLO_QUERY}
+
+UPDATE_LOW_STOCK_MUTATION = """
+mutation {
+    updateLowStockProducts {
+        updatedProducts {
+            id
+            name
+            stock
+        }
+        message
+        success
+        count
+    }
+}
+"""
+
+
+def _parse_document(source):
+    """
+    Parse and validate a document against the schema once, at import.
+    
+    execute_sync() skips validation, so a field renamed in the schema would
+    otherwise only surface as a runtime failure inside the cron job.
+    """
+    document = parse(source)
+    errors = validate(schema.graphql_schema, document)
+    if errors:
+        raise ValueError(
+            "Invalid cron GraphQL document: " + "; ".join(error.message for error in errors)
+        )
+    return document
+
+
+# Parsed once at import; the in-process path executes these documents directly
+HELLO_DOCUMENT = _parse_document(HELLO_QUERY)
+UPDATE_LOW_STOCK_DOCUMENT = _parse_document(UPDATE_LOW_STOCK_MUTATION)
+
+# Shared session so repeated cron runs reuse pooled connections
+SESSION = requests.Session()
+SESSION.headers.update({'Content-Type': 'application/json'})
+_adapter = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.3)
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
 
 
 def log_crm_heartbeat():
@@ -10,54 +75,53 @@ def log_crm_heartbeat():
     Task 2: Logs a heartbeat message every 5 minutes to confirm CRM health.
     Optionally queries the GraphQL hello field to verify endpoint responsiveness.
     """
+    start_log_listener()
+    
     try:
         # Create timestamp in DD/MM/YYYY-HH:MM:SS format
-        timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-        message = f"{timestamp} CRM is alive"
+        timestamp = time.strftime(TS_FMT)
+        parts = [f"{timestamp} CRM is alive"]
         
         # Optional: Query GraphQL hello field to verify endpoint
         try:
-            graphql_url = "http://localhost:8000/graphql"
-            hello_query = """
-            query {
-                hello
-            }
-            """
-            
-            response = requests.post(
-                graphql_url,
-                json={'query': hello_query},
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'errors' not in data:
-                    message += " - GraphQL endpoint responsive"
+            if getattr(settings, 'CRM_HEALTHCHECK_OVER_HTTP', False):
+                # Going through HTTP also verifies the web server is up
+                response = SESSION.post(
+                    GRAPHQL_URL,
+                    json=HELLO_PAYLOAD,
+                    timeout=10
+                )
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    if 'errors' not in data:
+                        parts.append(" - GraphQL endpoint responsive")
+                    else:
+                        parts.append(" - GraphQL endpoint has errors")
                 else:
-                    message += " - GraphQL endpoint has errors"
+                    parts.append(" - GraphQL endpoint not responding")
             else:
-                message += " - GraphQL endpoint not responding"
+                result = execute_sync(schema.graphql_schema, HELLO_DOCUMENT)
+                if not result.errors:
+                    parts.append(" - GraphQL schema responsive")
+                else:
+                    parts.append(" - GraphQL schema has errors")
                 
         except Exception as e:
-            message += f" - GraphQL check failed: {str(e)}"
+            parts.append(f" - GraphQL check failed: {str(e)}")
         
-        # Append message to log file (don't overwrite)
-        message += "\n"
-        with open('/tmp/crm_heartbeat_log.txt', 'a') as f:
-            f.write(message)
+        # Queue the message; the background listener appends and rotates the file
+        heartbeat_logger.info("".join(parts))
             
         print("Heartbeat logged successfully!")
             
     except Exception as e:
         # Fallback logging in case of errors
-        timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-        error_message = f"{timestamp} CRM heartbeat ERROR: {str(e)}\n"
+        timestamp = time.strftime(TS_FMT)
+        error_message = f"{timestamp} CRM heartbeat ERROR: {str(e)}"
         
         try:
-            with open('/tmp/crm_heartbeat_log.txt', 'a') as f:
-                f.write(error_message)
+            heartbeat_logger.error(error_message)
         except:
             print(f"Failed to log heartbeat error: {str(e)}")
 
@@ -68,116 +132,54 @@ def update_low_stock():
     Runs every 12 hours to update products with stock < 10.
     """
     try:
-        # GraphQL endpoint URL
-        graphql_url = "http://localhost:8000/graphql"
-        
-        # GraphQL mutation query
-        mutation = """
-        mutation {
-            updateLowStockProducts {
-                updatedProducts {
-                    id
-                    name
-                    stock
-                }
-                message
-                success
-                count
-            }
-        }
-        """
-        
-        # Prepare the request
-        headers = {
-            'Content-Type': 'application/json',
-        }
-        
-        payload = {
-            'query': mutation
-        }
-        
-        # Execute the GraphQL mutation
-        response = requests.post(
-            graphql_url,
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
-        
-        # Check if request was successful
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Check for GraphQL errors
-            if 'errors' in data:
-                error_messages = [error.get('message', 'Unknown error') for error in data['errors']]
-                raise Exception(f"GraphQL errors: {', '.join(error_messages)}")
-            
-            # Extract mutation result
-            mutation_result = data.get('data', {}).get('updateLowStockProducts', {})
-            
-            if not mutation_result:
-                raise Exception("No mutation result returned")
-            
-            # Create timestamp
-            timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-            
-            # Prepare log message
-            log_message = f"{timestamp} Low Stock Update Results:\n"
-            log_message += f"Success: {mutation_result.get('success', False)}\n"
-            log_message += f"Message: {mutation_result.get('message', 'No message')}\n"
-            log_message += f"Products Updated: {mutation_result.get('count', 0)}\n"
-            
-            # Log each updated product with name and new stock level
-            updated_products = mutation_result.get('updatedProducts', [])
-            if updated_products:
-                log_message += "Updated Products:\n"
-                for product in updated_products:
-                    product_name = product.get('name', 'Unknown')
-                    new_stock = product.get('stock', 0)
-                    product_id = product.get('id', 'Unknown')
-                    log_message += f"  - ID: {product_id}, Name: {product_name}, New Stock: {new_stock}\n"
-            else:
-                log_message += "No products were updated.\n"
-            
-            log_message += "-" * 50 + "\n"
-            
-            # Write to log file
-            with open('/tmp/low_stock_updates_log.txt', 'a') as f:
-                f.write(log_message)
-            
-            print("Low stock update completed successfully!")
-            
+        # Execute the GraphQL mutation in-process
+        result = execute_sync(schema.graphql_schema, UPDATE_LOW_STOCK_DOCUMENT)
+        
+        # Check for GraphQL errors
+        if result.errors:
+            error_messages = [error.message for error in result.errors]
+            raise Exception(f"GraphQL errors: {', '.join(error_messages)}")
+        
+        # Extract mutation result
+        mutation_result = (result.data or {}).get('updateLowStockProducts', {})
+        
+        if not mutation_result:
+            raise Exception("No mutation result returned")
+        
+        # Create timestamp
+        timestamp = time.strftime(TS_FMT)
+        
+        # Prepare log message
+        parts = [
+            f"{timestamp} Low Stock Update Results:\n",
+            f"Success: {mutation_result.get('success', False)}\n",
+            f"Message: {mutation_result.get('message', 'No message')}\n",
+            f"Products Updated: {mutation_result.get('count', 0)}\n",
+        ]
+        
+        # Log each updated product with name and new stock level
+        updated_products = mutation_result.get('updatedProducts', [])
+        if updated_products:
+            parts.append("Updated Products:\n")
+            for product in updated_products:
+                product_name = product.get('name', 'Unknown')
+                new_stock = product.get('stock', 0)
+                product_id = product.get('id', 'Unknown')
+                parts.append(f"  - ID: {product_id}, Name: {product_name}, New Stock: {new_stock}\n")
         else:
-            # HTTP error
-            error_msg = f"HTTP {response.status_code}: {response.text}"
-            raise Exception(error_msg)
-            
-    except requests.exceptions.RequestException as e:
-        # Network/connection errors
-        timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-        error_message = f"{timestamp} ERROR - Network error during low stock update: {str(e)}\n"
-        error_message += "-" * 50 + "\n"
+            parts.append("No products were updated.\n")
         
-        with open('/tmp/low_stock_updates_log.txt', 'a') as f:
-            f.write(error_message)
-        
-        print(f"Network error during low stock update: {str(e)}")
-        
-    except json.JSONDecodeError as e:
-        # JSON parsing errors
-        timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-        error_message = f"{timestamp} ERROR - Invalid JSON response during low stock update: {str(e)}\n"
-        error_message += "-" * 50 + "\n"
+        parts.append("-" * 50 + "\n")
         
+        # Write to log file
         with open('/tmp/low_stock_updates_log.txt', 'a') as f:
-            f.write(error_message)
+            f.write("".join(parts))
         
-        print(f"JSON parsing error during low stock update: {str(e)}")
+        print("Low stock update completed successfully!")
         
     except Exception as e:
         # General errors
-        timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
+        timestamp = time.strftime(TS_FMT)
         error_message = f"{timestamp} ERROR - Unexpected error during low stock update: {str(e)}\n"
         error_message += "-" * 50 + "\n"
         
@@ -193,8 +195,8 @@ def cleanup_old_logs():
     Cleanup function to manage log file sizes.
     Keeps only the last 1000 lines of each log file.
     """
+    # The heartbeat log is rotated by its RotatingFileHandler (see crm.logging_setup)
     log_files = [
-        '/tmp/crm_heartbeat_log.txt',
         '/tmp/low_stock_updates_log.txt',
         '/tmp/order_reminders_log.txt',
         '/tmp/customer_cleanup_log.txt'
@@ -203,13 +205,18 @@ def cleanup_old_logs():
     for log_file in log_files:
         try:
             if os.path.exists(log_file):
+                # Stream the file, holding at most 1001 lines in memory
                 with open(log_file, 'r') as f:
-                    lines = f.readlines()
+                    tail = deque(f, maxlen=1001)
                 
                 # Keep only last 1000 lines
-                if len(lines) > 1000:
-                    with open(log_file, 'w') as f:
-                        f.writelines(lines[-1000:])
+                if len(tail) > 1000:
+                    tail.popleft()
+                    tmp_file = log_file + '.tmp'
+                    with open(tmp_file, 'w') as f:
+                        f.writelines(tail)
+                    # Atomic swap so writers never see a truncated file
+                    os.replace(tmp_file, log_file)
                     
                     print(f"Cleaned up {log_file}, kept last 1000 lines")
                     
@@ -1,22 +1,30 @@
 import django_filters
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Upper
 from .models import Customer, Product, Order
 
 
+def filter_upper_contains(queryset, name, value):
+    """Case-insensitive partial match against an uppercased generated column"""
+    if value:
+        return queryset.filter(**{f'{name}__contains': Upper(Value(value))})
+    return queryset
+
+
 class CustomerFilter(django_filters.FilterSet):
     """Filter for Customer model with comprehensive search capabilities"""
     
     # Name filtering - case-insensitive partial match
     name = django_filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains',
+        field_name='uname',
+        method=filter_upper_contains,
         help_text="Filter by customer name (case-insensitive partial match)"
     )
     
     # Email filtering - case-insensitive partial match
     email = django_filters.CharFilter(
-        field_name='email',
-        lookup_expr='icontains',
+        field_name='uemail',
+        method=filter_upper_contains,
         help_text="Filter by email (case-insensitive partial match)"
     )
     
@@ -55,8 +63,8 @@ class ProductFilter(django_filters.FilterSet):
     
     # Name filtering - case-insensitive partial match
     name = django_filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains',
+        field_name='uname',
+        method=filter_upper_contains,
         help_text="Filter by product name (case-insensitive partial match)"
     )
     
@@ -109,6 +117,16 @@ class ProductFilter(django_filters.FilterSet):
         fields = ['name', 'price_gte', 'price_lte', 'stock', 'stock_gte', 'stock_lte', 'low_stock']
 
 
+def _has_product(**lookups):
+    """
+    EXISTS semi-join against the order/product link table. Unlike a
+    products__ lookup it never duplicates order rows, so no DISTINCT is needed.
+    """
+    return Exists(
+        Order.products.through.objects.filter(order=OuterRef('pk'), **lookups)
+    )
+
+
 class OrderFilter(django_filters.FilterSet):
     """Filter for Order model with comprehensive filtering including related fields"""
     
@@ -140,29 +158,29 @@ class OrderFilter(django_filters.FilterSet):
     
     # Customer name filtering (related field lookup)
     customer_name = django_filters.CharFilter(
-        field_name='customer__name',
-        lookup_expr='icontains',
+        field_name='customer__uname',
+        method=filter_upper_contains,
         help_text="Filter orders by customer name (case-insensitive partial match)"
     )
     
     # Customer email filtering (related field lookup)
     customer_email = django_filters.CharFilter(
-        field_name='customer__email',
-        lookup_expr='icontains',
+        field_name='customer__uemail',
+        method=filter_upper_contains,
         help_text="Filter orders by customer email (case-insensitive partial match)"
     )
     
     # Product name filtering (related field lookup through many-to-many)
     product_name = django_filters.CharFilter(
-        field_name='products__name',
-        lookup_expr='icontains',
+        field_name='products__uname',
+        method='filter_product_name',
         help_text="Filter orders by product name (case-insensitive partial match)"
     )
     
     # Specific product ID filter
     product_id = django_filters.NumberFilter(
         field_name='products__id',
-        lookup_expr='exact',
+        method='filter_product_id',
         help_text="Filter orders that include a specific product ID"
     )
     
@@ -178,12 +196,33 @@ class OrderFilter(django_filters.FilterSet):
         help_text="Filter high-value orders (total amount > 500)"
     )
     
+    def filter_product_name(self, queryset, name, value):
+        """Custom filter for orders containing a product whose name matches"""
+        if value:
+            return queryset.filter(_has_product(product__uname__contains=Upper(Value(value))))
+        return queryset
+    
+    def filter_product_id(self, queryset, name, value):
+        """Custom filter for orders that include a specific product ID"""
+        if value:
+            return queryset.filter(_has_product(product_id=value))
+        return queryset
+    
     def filter_product_count(self, queryset, name, value):
         """Custom filter for orders with specific number of products"""
         if value:
-            return queryset.annotate(
-                product_count=Count('products')
-            ).filter(product_count=value)
+            # Count through a correlated subquery rather than a JOIN + GROUP BY
+            # on the order query, so the other filters can't skew the count
+            product_counts = (
+                Order.products.through.objects
+                .filter(order=OuterRef('pk'))
+                .values('order')
+                .annotate(count=Count('pk'))
+                .values('count')
+            )
+            return queryset.alias(
+                _product_count=Coalesce(Subquery(product_counts), 0)
+            ).filter(_product_count=value)
         return queryset
     
     def filter_high_value(self, queryset, name, value):
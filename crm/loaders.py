@@ -0,0 +1,23 @@
+"""
+Per-request DataLoaders for the CRM GraphQL schema.
+
+Loads requested while a GraphQL query is executing are queued and resolved
+together, so N lookups of the same type collapse into one `WHERE id IN (...)`
+query. New instances are attached to every request by
+`crm.middleware.DataLoaderMiddleware`.
+"""
+
+from graphql_sync_dataloaders import SyncDataLoader
+
+from crm.models import Customer
+
+
+class CustomerLoader(SyncDataLoader):
+    """Batch-load customers by primary key"""
+    
+    def __init__(self):
+        super().__init__(self.batch_load_fn)
+    
+    def batch_load_fn(self, keys):
+        by_id = Customer.objects.in_bulk(keys)
+        return [by_id.get(key) for key in keys]
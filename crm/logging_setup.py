@@ -0,0 +1,101 @@
+"""
+Background log writers for CRM scheduled jobs.
+
+Cron jobs log through `heartbeat_logger` and the report tasks append their
+report lines through `report_logger`. Their QueueHandlers only enqueue the
+record; a single QueueListener thread performs the actual file writes:
+heartbeat records go to a size-rotated file, report lines to the report log
+(kept open between writes).
+
+The listener is started lazily by the cron jobs and report tasks that use
+these loggers, so other processes (runserver, migrate, tests) never start
+it. Both loggers keep propagating, so the `crm` handlers configured in
+settings LOGGING still see their records.
+"""
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+)
+
+
+HEARTBEAT_LOG_PATH = '/tmp/crm_heartbeat_log.txt'
+REPORT_LOG_PATH = '/tmp/crm_report_log.txt'  # ALX expects this exact path
+
+heartbeat_logger = logging.getLogger('crm.heartbeat')
+report_logger = logging.getLogger('crm.report')
+
+_listener = None
+_queue_handlers = []
+
+
+def start_log_listener():
+    """
+    Attach the queue handlers and start the background writer (idempotent).
+    
+    Called at the top of every entry point that logs through these loggers;
+    records logged before the first call only propagate.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    
+    # delay=True: processes that never log don't open the file
+    file_handler = RotatingFileHandler(
+        HEARTBEAT_LOG_PATH,
+        maxBytes=1 << 20,
+        backupCount=3,
+        delay=True
+    )
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+    file_handler.addFilter(logging.Filter(heartbeat_logger.name))
+    
+    # cleanup_old_reports swaps the report log with os.replace(); the watched
+    # handler notices the new inode and reopens instead of writing to the
+    # unlinked file. Messages carry their own newlines.
+    report_handler = WatchedFileHandler(REPORT_LOG_PATH, delay=True)
+    report_handler.terminator = ''
+    report_handler.setFormatter(logging.Formatter('%(message)s'))
+    report_handler.addFilter(logging.Filter(report_logger.name))
+    
+    # Both loggers share one queue; the handler filters route each record
+    log_queue = queue.SimpleQueue()
+    for logger in (heartbeat_logger, report_logger):
+        handler = QueueHandler(log_queue)
+        _queue_handlers.append(handler)
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    
+    _listener = QueueListener(
+        log_queue, file_handler, report_handler, respect_handler_level=True
+    )
+    _listener.start()
+    # Drain queued records before the (short-lived) cron process exits
+    atexit.register(_stop_log_listener)
+    # The listener thread does not survive fork() (e.g. a Celery prefork
+    # parent that already logged), so each child needs its own
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_log_listener)
+
+
+def _stop_log_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_log_listener():
+    """Give a forked child a fresh queue and writer thread"""
+    global _listener
+    if _listener is None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    for handler in _queue_handlers:
+        handler.queue = log_queue
+    _listener = QueueListener(
+        log_queue, *_listener.handlers, respect_handler_level=True
+    )
+    _listener.start()
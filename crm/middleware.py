@@ -0,0 +1,17 @@
+from crm.loaders import CustomerLoader
+
+
+class DataLoaderMiddleware:
+    """
+    Attach fresh DataLoaders to every request.
+
+    Loaders cache what they fetch, so they must not outlive the request
+    they were created for.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.customer_loader = CustomerLoader()
+        return self.get_response(request)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:55
+
+import re
+
+from django.db import migrations, models
+
+
+# Same pattern as the constraint below (crm.models.PHONE_PATTERN at the time)
+PHONE_RE = re.compile(r'^\+?1?-?\d{3}-?\d{3}-?\d{4}$|^\+?\d{10,15}$')
+
+
+def clean_nonconforming_phones(apps, schema_editor):
+    """
+    Make existing rows satisfy phone_format before it is added.
+
+    CreateCustomer's old regex had no trailing `$`, so phones with trailing
+    garbage got in. Keep a phone if trimming whitespace makes it valid,
+    otherwise clear it (phone is optional) rather than fail the migration.
+    """
+    Customer = apps.get_model('crm', 'Customer')
+    phones = Customer.objects.exclude(phone__isnull=True).values_list('pk', 'phone')
+    cleared = []
+    # Materialized before updating, so no read cursor is open on the table
+    for pk, phone in list(phones):
+        if PHONE_RE.match(phone):
+            continue
+        if PHONE_RE.match(phone.strip()):
+            Customer.objects.filter(pk=pk).update(phone=phone.strip())
+        else:
+            cleared.append(pk)
+    if cleared:
+        Customer.objects.filter(pk__in=cleared).update(phone=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_nonconforming_phones, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.CheckConstraint(condition=models.Q(('phone__isnull', True), ('phone__regex', '^\\+?1?-?\\d{3}-?\\d{3}-?\\d{4}$|^\\+?\\d{10,15}$'), _connector='OR'), name='phone_format'),
+        ),
+    ]
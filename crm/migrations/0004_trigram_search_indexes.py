@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# (index name, table, column) for every column the filters search with icontains
+TRIGRAM_INDEXES = [
+    ('crm_customer_name_trgm', 'crm_customer', 'name'),
+    ('crm_customer_email_trgm', 'crm_customer', 'email'),
+    ('crm_customer_phone_trgm', 'crm_customer', 'phone'),
+    ('crm_product_name_trgm', 'crm_product', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Trigram indexes only exist on PostgreSQL; other backends keep the plain scan
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table, column in TRIGRAM_INDEXES:
+        # icontains compiles to UPPER(col::text) LIKE UPPER(%s), so index that
+        # exact expression for the planner to pick it up
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
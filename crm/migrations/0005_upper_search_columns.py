@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:59
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# Trigram indexes from 0004 on UPPER(col::text) that the generated columns
+# replace, mapped to the index built on the generated column instead
+SUPERSEDED_TRIGRAM_INDEXES = [
+    ('crm_customer_name_trgm', 'crm_customer_uname_trgm', 'crm_customer', 'name', 'uname'),
+    ('crm_customer_email_trgm', 'crm_customer_uemail_trgm', 'crm_customer', 'email', 'uemail'),
+    ('crm_product_name_trgm', 'crm_product_uname_trgm', 'crm_product', 'name', 'uname'),
+]
+
+
+def move_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for old_name, new_name, table, column, generated in SUPERSEDED_TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {new_name} ON {table} '
+            f'USING gin ({generated} gin_trgm_ops)'
+        )
+        schema_editor.execute(f'DROP INDEX IF EXISTS {old_name}')
+
+
+def restore_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for old_name, new_name, table, column, generated in SUPERSEDED_TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {old_name} ON {table} '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+        schema_editor.execute(f'DROP INDEX IF EXISTS {new_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='uemail',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Upper('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='uname',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Upper('name'), output_field=models.CharField(max_length=100)),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='uname',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Upper('name'), output_field=models.CharField(max_length=255)),
+        ),
+        migrations.RunPython(move_trigram_indexes, restore_trigram_indexes),
+    ]
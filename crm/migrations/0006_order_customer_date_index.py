@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_upper_search_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-order_date'], name='order_cust_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0006_order_customer_date_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='uemail',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='uname',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper('name'), output_field=models.CharField(max_length=100)),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='uname',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper('name'), output_field=models.CharField(max_length=255)),
+        ),
+    ]
@@ -1,11 +1,17 @@
+import re
 from django.db import models
 from django.core.validators import RegexValidator
+from django.db.models.functions import Upper
 from django.utils import timezone
 from decimal import Decimal
 
 
+PHONE_PATTERN = r'^\+?1?-?\d{3}-?\d{3}-?\d{4}$|^\+?\d{10,15}$'
+PHONE_RE = re.compile(PHONE_PATTERN)
+
+
 class Customer(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     email = models.EmailField(unique=True)
     phone = models.CharField(
         max_length=20, 
@@ -13,22 +19,50 @@ class Customer(models.Model):
         null=True,
         validators=[
             RegexValidator(
-                regex=r'^\+?1?-?\d{3}-?\d{3}-?\d{4}$|^\+?\d{10,15}$',
+                regex=PHONE_PATTERN,
                 message="Phone number must be in format: '+1234567890' or '123-456-7890'"
             )
         ]
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Uppercased copies maintained by the database, so case-insensitive search
+    # reads a stored column (trigram-indexed on PostgreSQL, see migration 0005)
+    # instead of applying UPPER() per row
+    uname = models.GeneratedField(
+        expression=Upper('name'),
+        output_field=models.CharField(max_length=100),
+        db_persist=True
+    )
+    uemail = models.GeneratedField(
+        expression=Upper('email'),
+        output_field=models.CharField(max_length=254),
+        db_persist=True
+    )
+    
+    class Meta:
+        constraints = [
+            # Enforce the phone format in the database too, so bulk inserts are
+            # checked in the same statement
+            models.CheckConstraint(
+                condition=models.Q(phone__isnull=True) | models.Q(phone__regex=PHONE_PATTERN),
+                name='phone_format',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.email})"
 
 
 class Product(models.Model):
-    name = models.CharField(max_length=255)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    stock = models.PositiveIntegerField(default=0)
+    name = models.CharField(max_length=255, db_index=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
+    stock = models.PositiveIntegerField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    uname = models.GeneratedField(
+        expression=Upper('name'),
+        output_field=models.CharField(max_length=255),
+        db_persist=True
+    )
     
     def clean(self):
         if self.price <= 0:
@@ -41,21 +75,21 @@ class Product(models.Model):
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     products = models.ManyToManyField(Product, related_name='orders')
-    order_date = models.DateTimeField(default=timezone.now)
-    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    order_date = models.DateTimeField(default=timezone.now, db_index=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # A customer's order history, newest first, as a single index range
+            models.Index(fields=['customer', '-order_date'], name='order_cust_date_idx'),
+        ]
+    
     def calculate_total(self):
         """Calculate total amount based on associated products"""
-        total = sum(product.price for product in self.products.all())
+        total = self.products.aggregate(total=models.Sum('price'))['total'] or Decimal('0.00')
         self.total_amount = total
         return total
     
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.pk:  # Only calculate after initial save
-            self.calculate_total()
-            super().save(update_fields=['total_amount'])
-    
     def __str__(self):
         return f"Order {self.id} - {self.customer.name} - ${self.total_amount}"
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Keyset (seek) pagination for the orders connection.
+
+The default graphene-django connection runs a COUNT(*) and pages with
+OFFSET, both of which get slower as the table grows. This field instead
+orders by (order_date, id) descending and turns `after` into a WHERE clause,
+so every page is a bounded index range scan and no COUNT is issued.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql import GraphQLError
+
+
+def encode_order_cursor(order):
+    """Opaque cursor for an order: base64 of "<order_date ISO>|<id>" """
+    raw = f"{order.order_date.isoformat()}|{order.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_order_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        order_date, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(order_date), int(pk)
+    except (ValueError, UnicodeError):
+        raise GraphQLError(f"Invalid cursor: {cursor}")
+
+
+class OrderKeysetConnectionField(DjangoFilterConnectionField):
+    """Forward-only (`first`/`after`) connection over orders, newest first"""
+    
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        if args.get('last') or args.get('before') or args.get('offset'):
+            raise GraphQLError("Orders are keyset-paginated; use `first` and `after`")
+        
+        queryset = maybe_queryset(iterable).order_by('-order_date', '-id')
+        
+        # Cursors are built from order_date, so it must survive an only()
+        # narrowed to the selected fields or every edge reloads it
+        fields, deferred = queryset.query.deferred_loading
+        if not deferred:
+            queryset = queryset.only(*fields, 'order_date')
+        elif 'order_date' in fields:
+            queryset = queryset.defer(None).defer(*(fields - {'order_date'}))
+        
+        after = args.get('after')
+        if after:
+            order_date, pk = decode_order_cursor(after)
+            queryset = queryset.filter(
+                Q(order_date__lt=order_date) | Q(order_date=order_date, id__lt=pk)
+            )
+        
+        first = args.get('first')
+        if first is None:
+            first = max_limit
+        elif first < 0:
+            raise GraphQLError("Argument `first` must be a non-negative integer")
+        
+        if first is not None:
+            # Fetch one extra row to learn whether another page exists
+            orders = list(queryset[:first + 1])
+            has_next_page = len(orders) > first
+            orders = orders[:first]
+        else:
+            orders = list(queryset)
+            has_next_page = False
+        
+        edges = [
+            connection.Edge(node=order, cursor=encode_order_cursor(order))
+            for order in orders
+        ]
+        result = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=bool(after),
+                has_next_page=has_next_page,
+            ),
+        )
+        result.iterable = queryset
+        return result
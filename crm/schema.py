@@ -1,21 +1,27 @@
+import csv
+import io
+
 import graphene
 from crm.models import Product
 from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Count, Sum
 from django.utils import timezone
 from decimal import Decimal
-import re
-from crm.models import Customer, Product, Order
+import graphene_django_optimizer as gql_optimizer
+from crm.models import Customer, Product, Order, PHONE_RE
 from crm.filters import CustomerFilter, ProductFilter, OrderFilter
-
+from crm.pagination import OrderKeysetConnectionField
 
 # GraphQL Types
 class CustomerType(DjangoObjectType):
     class Meta:
         model = Customer
-        fields = "__all__"
+        # Listed explicitly; the generated search columns stay internal
+        fields = ('id', 'name', 'email', 'phone', 'created_at', 'orders')
         filter_fields = ['name', 'email', 'phone']
         interfaces = (graphene.relay.Node, )
 
@@ -23,17 +29,44 @@ class CustomerType(DjangoObjectType):
 class ProductType(DjangoObjectType):
     class Meta:
         model = Product
-        fields = "__all__"
+        fields = ('id', 'name', 'price', 'stock', 'created_at', 'orders')
         filter_fields = ['name', 'price', 'stock']
         interfaces = (graphene.relay.Node, )
 
 
+def _has_full_customer(order):
+    """
+    Whether the order already carries a fully loaded customer, e.g. the one
+    CreateOrder attached. Optimizer-built parents may be deferred down to the
+    selected fields, and reading anything else off those costs a query each.
+    """
+    return Order.customer.is_cached(order) and not order.customer.get_deferred_fields()
+
+
 class OrderType(DjangoObjectType):
     class Meta:
         model = Order
-        fields = "__all__"
+        fields = ('id', 'customer', 'products', 'order_date', 'total_amount', 'created_at')
         filter_fields = ['total_amount', 'order_date']
         interfaces = (graphene.relay.Node, )
+    
+    customer = graphene.Field(CustomerType)
+    
+    @gql_optimizer.resolver_hints(only=('customer_id',))
+    def resolve_customer(self, info):
+        # Batch customer lookups across all orders in the response; fall back
+        # to the plain FK access when executed without a request (e.g. cron)
+        loader = getattr(info.context, 'customer_loader', None)
+        if loader is None or _has_full_customer(self):
+            return self.customer
+        return loader.load(self.customer_id)
+
+
+class ReportStatsType(graphene.ObjectType):
+    """CRM-wide totals, aggregated in the database"""
+    total_customers = graphene.Int()
+    total_orders = graphene.Int()
+    total_revenue = graphene.Decimal()
 
 
 # Input Types for Filtering
@@ -106,8 +139,7 @@ class CreateCustomer(graphene.Mutation):
             
             # Validate phone format if provided
             if input.phone:
-                phone_pattern = r'^\+?1?-?\d{3}-?\d{3}-?\d{4}$|^\+?\d{10,15}'
-                if not re.match(phone_pattern, input.phone):
+                if not PHONE_RE.match(input.phone):
                     return CreateCustomer(
                         customer=None,
                         message="Phone number must be in format: '+1234567890' or '123-456-7890'",
@@ -135,6 +167,41 @@ class CreateCustomer(graphene.Mutation):
             )
 
 
+# Batches larger than this are loaded with COPY instead of INSERT on PostgreSQL
+COPY_THRESHOLD = 1000
+
+
+def _copy_customers(customers):
+    """
+    Load unsaved customers with PostgreSQL COPY, which skips the per-row
+    parse/plan work of INSERT. The generated search columns are filled in by
+    the database; primary keys are not reported back.
+    """
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    
+    quote = connection.ops.quote_name
+    created_at = timezone.now()
+    rows = [(customer.name, customer.email, customer.phone, created_at) for customer in customers]
+    sql = 'COPY {} ({}, {}, {}, {}) FROM STDIN'.format(
+        quote(Customer._meta.db_table), quote('name'), quote('email'), quote('phone'), quote('created_at')
+    )
+    
+    with connection.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            # In CSV an unquoted empty field is NULL; only phone may be NULL
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(
+                f"{sql} WITH (FORMAT csv, FORCE_NOT_NULL ({quote('name')}, {quote('email')}))",
+                buffer
+            )
+
+
 class BulkCreateCustomers(graphene.Mutation):
     class Arguments:
         input = graphene.List(CustomerInput, required=True)
@@ -147,31 +214,53 @@ class BulkCreateCustomers(graphene.Mutation):
         created_customers = []
         errors = []
         
-        with transaction.atomic():
-            for i, customer_data in enumerate(input):
-                try:
-                    # Check email uniqueness
-                    if Customer.objects.filter(email=customer_data.email).exists():
-                        errors.append(f"Customer {i+1}: Email '{customer_data.email}' already exists")
-                        continue
-                    
-                    # Validate phone if provided
-                    if customer_data.phone:
-                        phone_pattern = r'^\+?1?-?\d{3}-?\d{3}-?\d{4}$|^\+?\d{10,15}$'
-                        if not re.match(phone_pattern, customer_data.phone):
-                            errors.append(f"Customer {i+1}: Invalid phone format")
-                            continue
-                    
-                    # Create customer
-                    customer = Customer.objects.create(
-                        name=customer_data.name,
-                        email=customer_data.email,
-                        phone=customer_data.phone or None
-                    )
-                    created_customers.append(customer)
-                    
-                except Exception as e:
-                    errors.append(f"Customer {i+1}: {str(e)}")
+        # Fetch every email that already exists in a single query
+        existing_emails = set(
+            Customer.objects.filter(
+                email__in={customer_data.email for customer_data in input}
+            ).values_list('email', flat=True)
+        )
+        
+        to_create = []
+        # Bind hot-loop methods to locals to skip repeated attribute lookups
+        add_error = errors.append
+        add_email = existing_emails.add
+        add_customer = to_create.append
+        match_phone = PHONE_RE.match
+        for i, customer_data in enumerate(input):
+            # Check email uniqueness (against the DB and earlier rows in this batch)
+            if customer_data.email in existing_emails:
+                add_error(f"Customer {i+1}: Email '{customer_data.email}' already exists")
+                continue
+            
+            # Validate phone if provided
+            if customer_data.phone:
+                if not match_phone(customer_data.phone):
+                    add_error(f"Customer {i+1}: Invalid phone format")
+                    continue
+            
+            add_email(customer_data.email)
+            add_customer(Customer(
+                name=customer_data.name,
+                email=customer_data.email,
+                phone=customer_data.phone or None
+            ))
+        
+        if to_create:
+            try:
+                use_copy = len(to_create) > COPY_THRESHOLD and connection.vendor == 'postgresql'
+                with transaction.atomic():
+                    if use_copy:
+                        _copy_customers(to_create)
+                    else:
+                        created_customers = Customer.objects.bulk_create(to_create, batch_size=500)
+                    if use_copy or not connection.features.can_return_rows_from_bulk_insert:
+                        # COPY/backend didn't report the new PKs; read the rows back
+                        created_customers = list(Customer.objects.filter(
+                            email__in=[customer.email for customer in to_create]
+                        ))
+            except Exception as e:
+                errors.append(f"Error creating customers: {str(e)}")
         
         return BulkCreateCustomers(
             customers=created_customers,
@@ -228,6 +317,47 @@ class CreateProduct(graphene.Mutation):
             )
 
 
+def _use_single_statement_order_insert():
+    return (
+        getattr(settings, 'CRM_SINGLE_STATEMENT_ORDER_INSERT', False)
+        and connection.vendor == 'postgresql'
+    )
+
+
+def _insert_order_with_products(customer, order_date, total_amount, products):
+    """
+    Insert an order and its product links in one round-trip, using a
+    data-modifying CTE (PostgreSQL only).
+    """
+    quote = connection.ops.quote_name
+    through = Order.products.through
+    created_at = timezone.now()
+    sql = (
+        f"WITH new_order AS ("
+        f"INSERT INTO {quote(Order._meta.db_table)} "
+        f"({quote('customer_id')}, {quote('order_date')}, {quote('total_amount')}, {quote('created_at')}) "
+        f"VALUES (%s, %s, %s, %s) RETURNING {quote('id')}"
+        f"), links AS ("
+        f"INSERT INTO {quote(through._meta.db_table)} ({quote('order_id')}, {quote('product_id')}) "
+        f"SELECT new_order.{quote('id')}, product_id FROM new_order, unnest(%s::bigint[]) AS product_id"
+        f") SELECT {quote('id')} FROM new_order"
+    )
+    
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [customer.pk, order_date, total_amount, created_at, [product.pk for product in products]])
+        order_id = cursor.fetchone()[0]
+    
+    order = Order(
+        id=order_id,
+        customer=customer,
+        order_date=order_date,
+        total_amount=total_amount,
+        created_at=created_at
+    )
+    order._state.adding = False
+    return order
+
+
 class CreateOrder(graphene.Mutation):
     class Arguments:
         input = OrderInput(required=True)
@@ -238,16 +368,6 @@ class CreateOrder(graphene.Mutation):
     
     def mutate(self, info, input):
         try:
-            # Validate customer exists
-            try:
-                customer = Customer.objects.get(id=input.customer_id)
-            except Customer.DoesNotExist:
-                return CreateOrder(
-                    order=None,
-                    message=f"Customer with ID {input.customer_id} does not exist",
-                    success=False
-                )
-            
             # Validate at least one product is selected
             if not input.product_ids:
                 return CreateOrder(
@@ -256,32 +376,45 @@ class CreateOrder(graphene.Mutation):
                     success=False
                 )
             
-            # Validate all products exist
-            products = []
-            for product_id in input.product_ids:
-                try:
-                    product = Product.objects.get(id=product_id)
-                    products.append(product)
-                except Product.DoesNotExist:
+            # Look up the customer and products and create the order on one connection
+            with transaction.atomic():
+                # Validate customer exists
+                customer = Customer.objects.filter(pk=input.customer_id).first()
+                if customer is None:
                     return CreateOrder(
                         order=None,
-                        message=f"Product with ID {product_id} does not exist",
+                        message=f"Customer with ID {input.customer_id} does not exist",
                         success=False
                     )
-            
-            # Create order with transaction to ensure consistency
-            with transaction.atomic():
-                order = Order.objects.create(
-                    customer=customer,
-                    order_date=input.order_date or timezone.now()
-                )
                 
-                # Add products to order
-                order.products.set(products)
+                # Validate all products exist with a single query
+                product_ids = {int(product_id) for product_id in input.product_ids}
+                products_map = Product.objects.in_bulk(product_ids)
+                if len(products_map) != len(product_ids):
+                    missing = sorted(product_ids - products_map.keys())
+                    return CreateOrder(
+                        order=None,
+                        message=f"Product with ID {', '.join(map(str, missing))} does not exist",
+                        success=False
+                    )
+                products = list(products_map.values())
+                
+                # Products are already in memory, so the total is known up front
+                # and goes out with the INSERT
+                total_amount = sum(product.price for product in products)
+                order_date = input.order_date or timezone.now()
                 
-                # Calculate and save total amount
-                order.calculate_total()
-                order.save(update_fields=['total_amount'])
+                if _use_single_statement_order_insert():
+                    order = _insert_order_with_products(customer, order_date, total_amount, products)
+                else:
+                    order = Order.objects.create(
+                        customer=customer,
+                        order_date=order_date,
+                        total_amount=total_amount
+                    )
+                    
+                    # Add products to order
+                    order.products.add(*products)
             
             return CreateOrder(
                 order=order,
@@ -343,108 +476,149 @@ class UpdateLowStockProducts(graphene.Mutation):
             )
 
 
+def _apply_filterset(info, filterset_class, data, queryset):
+    """
+    Filter `queryset` with `filterset_class`, building each distinct filterset
+    only once per request (e.g. when the same filter is repeated under aliases).
+    """
+    context = info.context
+    if context is None:
+        return filterset_class(data=data, queryset=queryset).qs
+    
+    cache = context.__dict__.setdefault('_filter_cache', {})
+    key = (filterset_class, tuple(sorted(data.items())))
+    if key not in cache:
+        cache[key] = filterset_class(data=data, queryset=queryset).qs
+    return cache[key]
+
+
+# DjangoFilterConnectionField swallows an `order_by` keyword, so the argument
+# is passed through the generic `args` mapping instead
+ORDER_BY_ARGUMENT = graphene.String(description="Order by field (prefix with '-' for descending)")
+
+
 # Query Class with Filtering Support
 class Query(graphene.ObjectType):
     # Basic queries (existing)
-    customers = graphene.List(CustomerType)
-    products = graphene.List(ProductType)
-    orders = graphene.List(OrderType)
+    # Paginated connections, so a bare query never materializes whole tables
+    customers = DjangoFilterConnectionField(CustomerType, filterset_class=CustomerFilter)
+    products = DjangoFilterConnectionField(ProductType, filterset_class=ProductFilter)
+    orders = OrderKeysetConnectionField(OrderType, filterset_class=OrderFilter)
     
     customer = graphene.Field(CustomerType, id=graphene.ID(required=True))
     product = graphene.Field(ProductType, id=graphene.ID(required=True))
     order = graphene.Field(OrderType, id=graphene.ID(required=True))
     
+    report_stats = graphene.Field(ReportStatsType)
+    
     # Filtered queries with Connection support
     all_customers = DjangoFilterConnectionField(CustomerType, filterset_class=CustomerFilter)
     all_products = DjangoFilterConnectionField(ProductType, filterset_class=ProductFilter)
-    all_orders = DjangoFilterConnectionField(OrderType, filterset_class=OrderFilter)
+    all_orders = OrderKeysetConnectionField(OrderType, filterset_class=OrderFilter)
     
-    # Custom filtered queries with input types
-    filter_customers = graphene.List(
+    # Custom filtered queries with input types (paginated connections)
+    filter_customers = DjangoFilterConnectionField(
         CustomerType,
+        filterset_class=CustomerFilter,
         filter=CustomerFilterInput(),
-        order_by=graphene.String(description="Order by field (prefix with '-' for descending)")
+        args={'order_by': ORDER_BY_ARGUMENT}
     )
     
-    filter_products = graphene.List(
+    filter_products = DjangoFilterConnectionField(
         ProductType,
+        filterset_class=ProductFilter,
         filter=ProductFilterInput(),
-        order_by=graphene.String(description="Order by field (prefix with '-' for descending)")
+        args={'order_by': ORDER_BY_ARGUMENT}
     )
     
-    filter_orders = graphene.List(
+    filter_orders = DjangoFilterConnectionField(
         OrderType,
+        filterset_class=OrderFilter,
         filter=OrderFilterInput(),
-        order_by=graphene.String(description="Order by field (prefix with '-' for descending)")
+        args={'order_by': ORDER_BY_ARGUMENT}
     )
     
     # Basic resolvers
-    def resolve_customers(self, info):
-        return Customer.objects.all()
+    # gql_optimizer.query() derives select_related/prefetch_related/only from
+    # the client's selection set, so nested fields don't trigger N+1 queries
+    # and only the requested columns are read
+    def resolve_customers(self, info, **kwargs):
+        return gql_optimizer.query(Customer.objects.all(), info)
+    
+    def resolve_products(self, info, **kwargs):
+        return gql_optimizer.query(Product.objects.all(), info)
     
-    def resolve_products(self, info):
-        return Product.objects.all()
+    def resolve_orders(self, info, **kwargs):
+        return gql_optimizer.query(Order.objects.all(), info)
     
-    def resolve_orders(self, info):
-        return Order.objects.all().select_related('customer').prefetch_related('products')
+    def resolve_all_customers(self, info, **kwargs):
+        return gql_optimizer.query(Customer.objects.all(), info)
+    
+    def resolve_all_products(self, info, **kwargs):
+        return gql_optimizer.query(Product.objects.all(), info)
+    
+    def resolve_all_orders(self, info, **kwargs):
+        return gql_optimizer.query(Order.objects.all(), info)
+    
+    def resolve_report_stats(self, info):
+        # Scalars computed in SQL: order count and revenue share one aggregate
+        order_stats = Order.objects.aggregate(
+            total_orders=Count('id'),
+            total_revenue=Sum('total_amount')
+        )
+        return ReportStatsType(
+            total_customers=Customer.objects.count(),
+            total_orders=order_stats['total_orders'],
+            # SQLite returns the SUM with float-derived trailing digits
+            # (e.g. 2190.57000000000); report money to the cent
+            total_revenue=(order_stats['total_revenue'] or Decimal('0')).quantize(Decimal('0.01'))
+        )
     
     def resolve_customer(self, info, id):
-        try:
-            return Customer.objects.get(id=id)
-        except Customer.DoesNotExist:
-            return None
+        return gql_optimizer.query(Customer.objects.filter(pk=id), info).first()
     
     def resolve_product(self, info, id):
-        try:
-            return Product.objects.get(id=id)
-        except Product.DoesNotExist:
-            return None
+        return gql_optimizer.query(Product.objects.filter(pk=id), info).first()
     
     def resolve_order(self, info, id):
-        try:
-            return Order.objects.select_related('customer').prefetch_related('products').get(id=id)
-        except Order.DoesNotExist:
-            return None
+        return gql_optimizer.query(Order.objects.filter(pk=id), info).first()
     
     # Custom filtered query resolvers
-    def resolve_filter_customers(self, info, filter=None, order_by=None):
+    def resolve_filter_customers(self, info, filter=None, order_by=None, **kwargs):
         queryset = Customer.objects.all()
         
         if filter:
             # Apply filters using the CustomerFilter
-            filter_instance = CustomerFilter(data=filter, queryset=queryset)
-            queryset = filter_instance.qs
+            queryset = _apply_filterset(info, CustomerFilter, filter, queryset)
         
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return gql_optimizer.query(queryset, info)
     
-    def resolve_filter_products(self, info, filter=None, order_by=None):
+    def resolve_filter_products(self, info, filter=None, order_by=None, **kwargs):
         queryset = Product.objects.all()
         
         if filter:
             # Apply filters using the ProductFilter
-            filter_instance = ProductFilter(data=filter, queryset=queryset)
-            queryset = filter_instance.qs
+            queryset = _apply_filterset(info, ProductFilter, filter, queryset)
         
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return gql_optimizer.query(queryset, info)
     
-    def resolve_filter_orders(self, info, filter=None, order_by=None):
-        queryset = Order.objects.all().select_related('customer').prefetch_related('products')
+    def resolve_filter_orders(self, info, filter=None, order_by=None, **kwargs):
+        queryset = Order.objects.all()
         
         if filter:
             # Apply filters using the OrderFilter
-            filter_instance = OrderFilter(data=filter, queryset=queryset)
-            queryset = filter_instance.qs
+            queryset = _apply_filterset(info, OrderFilter, filter, queryset)
         
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return gql_optimizer.query(queryset, info)
 
 
 # Mutation Class - UPDATED to include UpdateLowStockProducts
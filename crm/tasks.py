@@ -7,15 +7,22 @@ processing data, and other background operations.
 
 import os
 import json
-import requests
+import logging
+import shutil
 from datetime import datetime
 from decimal import Decimal
 from celery import shared_task
 from django.conf import settings
-from django.db import models
+from django.db.models import Count, Sum
+from alx_backend_graphql_crm.schema import schema
+from crm.logging_setup import REPORT_LOG_PATH, report_logger, start_log_listener
 from crm.models import Customer, Order, Product
 
 
+# Propagates to the worker log (Celery's root handlers / settings LOGGING)
+logger = logging.getLogger(__name__)
+
+
 @shared_task
 def generate_crm_report():
     """
@@ -29,6 +36,12 @@ def generate_crm_report():
     Returns:
         dict: Report data including customers, orders, and revenue totals
     """
+    start_log_listener()
+    
+    # Create timestamp in YYYY-MM-DD HH:MM:SS format once per run; the
+    # success and error paths both reuse it
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
     try:
         # Method 1: Use GraphQL query (as requested in instructions)
         report_data = _fetch_report_via_graphql()
@@ -37,9 +50,6 @@ def generate_crm_report():
         if not report_data:
             report_data = _fetch_report_via_database()
         
-        # Create timestamp in YYYY-MM-DD HH:MM:SS format
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
         # Format the report message
         report_message = (
             f"{timestamp} - Report: "
@@ -48,12 +58,7 @@ def generate_crm_report():
             f"${report_data['total_revenue']:.2f} revenue.\n"
         )
         
-        # Log the report to file (ALX expects this exact path)
-        log_file_path = '/tmp/crm_report_log.txt'
-        with open(log_file_path, 'a') as f:
-            f.write(report_message)
-        
-        # Log additional details for debugging
+        # Additional details for debugging
         detailed_message = (
             f"{timestamp} - Detailed Report:\n"
             f"  Total Customers: {report_data['total_customers']}\n"
@@ -63,10 +68,11 @@ def generate_crm_report():
             f"{'-' * 50}\n"
         )
         
-        with open(log_file_path, 'a') as f:
-            f.write(detailed_message)
+        # Hand the report and its details to the log writer thread as one
+        # record; it appends them to /tmp/crm_report_log.txt in one write
+        report_logger.info(report_message + detailed_message)
         
-        print(f"CRM Report generated successfully: {report_message.strip()}")
+        logger.info(f"CRM Report generated successfully: {report_message.strip()}")
         
         return {
             'success': True,
@@ -77,16 +83,11 @@ def generate_crm_report():
         
     except Exception as exc:
         # Log the error
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         error_message = f"{timestamp} - ERROR generating report: {str(exc)}\n"
         
-        try:
-            with open('/tmp/crm_report_log.txt', 'a') as f:
-                f.write(error_message)
-        except:
-            pass  # Avoid secondary errors
+        report_logger.error(error_message)
         
-        print(f"Error generating CRM report: {str(exc)}")
+        logger.error(f"Error generating CRM report: {str(exc)}")
         
         return {
             'success': False,
@@ -101,6 +102,12 @@ def generate_crm_report_with_retry(self):
     """
     Alternative version with retry functionality for more robust operations.
     """
+    start_log_listener()
+    
+    # Create timestamp in YYYY-MM-DD HH:MM:SS format once per run; the
+    # success and error paths both reuse it
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
     try:
         # Method 1: Use GraphQL query (as requested in instructions)
         report_data = _fetch_report_via_graphql()
@@ -109,9 +116,6 @@ def generate_crm_report_with_retry(self):
         if not report_data:
             report_data = _fetch_report_via_database()
         
-        # Create timestamp in YYYY-MM-DD HH:MM:SS format
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
         # Format the report message
         report_message = (
             f"{timestamp} - Report: "
@@ -120,12 +124,10 @@ def generate_crm_report_with_retry(self):
             f"${report_data['total_revenue']:.2f} revenue.\n"
         )
         
-        # Log the report to file
-        log_file_path = '/tmp/crm_report_log.txt'
-        with open(log_file_path, 'a') as f:
-            f.write(report_message)
+        # Log the report to file (via the log writer thread)
+        report_logger.info(report_message)
         
-        print(f"CRM Report generated successfully: {report_message.strip()}")
+        logger.info(f"CRM Report generated successfully: {report_message.strip()}")
         
         return {
             'success': True,
@@ -136,16 +138,11 @@ def generate_crm_report_with_retry(self):
         
     except Exception as exc:
         # Log the error
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         error_message = f"{timestamp} - ERROR generating report: {str(exc)}\n"
         
-        try:
-            with open('/tmp/crm_report_log.txt', 'a') as f:
-                f.write(error_message)
-        except:
-            pass  # Avoid secondary errors
+        report_logger.error(error_message)
         
-        print(f"Error generating CRM report: {str(exc)}")
+        logger.error(f"Error generating CRM report: {str(exc)}")
         
         # Retry the task if we haven't exceeded max retries
         if self.request.retries < self.max_retries:
@@ -161,75 +158,43 @@ def generate_crm_report_with_retry(self):
 
 def _fetch_report_via_graphql():
     """
-    Fetch report data using GraphQL queries.
+    Fetch report data using GraphQL queries, executed in-process against the
+    project schema rather than over HTTP.
     
     Returns:
         dict: Report data or None if GraphQL query fails
     """
     try:
-        graphql_url = "http://localhost:8000/graphql"
-        
         # GraphQL query to fetch all required data
         query = """
         query {
-            customers {
-                id
-            }
-            orders {
-                id
-                totalAmount
+            reportStats {
+                totalCustomers
+                totalOrders
+                totalRevenue
             }
         }
         """
         
-        headers = {
-            'Content-Type': 'application/json',
-        }
+        # Execute the GraphQL query directly; no socket, request cycle or JSON
+        result = schema.execute(query)
         
-        payload = {
-            'query': query
-        }
+        # Check for GraphQL errors
+        if result.errors:
+            error_messages = [error.message for error in result.errors]
+            raise Exception(f"GraphQL errors: {', '.join(error_messages)}")
         
-        # Execute the GraphQL query
-        response = requests.post(
-            graphql_url,
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
+        # Extract data; the totals are already aggregated by the resolver
+        stats = (result.data or {})['reportStats']
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Check for GraphQL errors
-            if 'errors' in data:
-                error_messages = [error.get('message', 'Unknown error') for error in data['errors']]
-                raise Exception(f"GraphQL errors: {', '.join(error_messages)}")
-            
-            # Extract data
-            query_data = data.get('data', {})
-            customers = query_data.get('customers', [])
-            orders = query_data.get('orders', [])
-            
-            # Calculate totals
-            total_customers = len(customers)
-            total_orders = len(orders)
-            total_revenue = sum(
-                float(order.get('totalAmount', 0)) 
-                for order in orders 
-                if order.get('totalAmount')
-            )
-            
-            return {
-                'total_customers': total_customers,
-                'total_orders': total_orders,
-                'total_revenue': total_revenue
-            }
-        else:
-            raise Exception(f"HTTP {response.status_code}: {response.text}")
+        return {
+            'total_customers': stats['totalCustomers'],
+            'total_orders': stats['totalOrders'],
+            'total_revenue': float(stats['totalRevenue'])
+        }
             
     except Exception as e:
-        print(f"GraphQL query failed: {str(e)}")
+        logger.error(f"GraphQL query failed: {str(e)}")
         return None
 
 
@@ -237,28 +202,29 @@ def _fetch_report_via_database():
     """
     Fetch report data using direct database queries as fallback.
     
+    All three totals come from one aggregate over customers LEFT JOINed to
+    their orders (every order has a customer), so the fallback costs a single
+    database round-trip instead of three. Each order appears once in the
+    join, and customers without orders still count.
+    
     Returns:
         dict: Report data
     """
     try:
-        # Direct database queries
-        total_customers = Customer.objects.count()
-        total_orders = Order.objects.count()
-        
-        # Calculate total revenue
-        revenue_result = Order.objects.aggregate(
-            total_revenue=models.Sum('total_amount')
+        stats = Customer.objects.aggregate(
+            total_customers=Count('id', distinct=True),
+            total_orders=Count('orders'),
+            total_revenue=Sum('orders__total_amount')
         )
-        total_revenue = float(revenue_result['total_revenue'] or 0)
         
         return {
-            'total_customers': total_customers,
-            'total_orders': total_orders,
-            'total_revenue': total_revenue
+            'total_customers': stats['total_customers'],
+            'total_orders': stats['total_orders'],
+            'total_revenue': float(stats['total_revenue'] or 0)
         }
         
     except Exception as e:
-        print(f"Database query failed: {str(e)}")
+        logger.error(f"Database query failed: {str(e)}")
         raise
 
 
@@ -278,52 +244,99 @@ def test_celery_task():
         with open('/tmp/celery_test_log.txt', 'a') as f:
             f.write(f"{message}\n")
     except Exception as e:
-        print(f"Failed to write to log: {str(e)}")
+        logger.error(f"Failed to write to log: {str(e)}")
     
-    print(message)
+    logger.info(message)
     return message
 
 
+# Read size used when scanning log files backwards from the end
+TAIL_CHUNK_SIZE = 64 * 1024
+
+
+def _tail_start(f, size, keep):
+    """
+    Scan a binary file backwards to find where its last `keep` lines start.
+    
+    Returns:
+        tuple: (byte offset of the kept tail, number of lines scanned); the
+        offset is 0 when the file has no more than `keep` lines, in which
+        case the line count covers the whole file
+    """
+    if size == 0:
+        return 0, 0
+    
+    # A trailing newline ends the last line rather than starting a new one
+    f.seek(size - 1)
+    end = size - 1 if f.read(1) == b'\n' else size
+    
+    position = end
+    newlines = 0
+    while position > 0:
+        step = min(TAIL_CHUNK_SIZE, position)
+        position -= step
+        f.seek(position)
+        chunk = f.read(step)
+        newlines += chunk.count(b'\n')
+        if newlines >= keep:
+            # The kept tail starts after the keep-th newline from the end
+            index = -1
+            for _ in range(newlines - keep + 1):
+                index = chunk.index(b'\n', index + 1)
+            return position + index + 1, keep
+    
+    return 0, newlines + 1
+
+
 @shared_task(bind=True)
 def cleanup_old_reports(self):
     """
     Cleanup task to manage report log file size.
     Keeps only the last 500 lines of the report log.
     
+    The file is scanned backwards in fixed-size chunks to find where the last
+    500 lines start, so memory use is bounded by the chunk size and only the
+    kept tail is read, whatever the log size.
+    
     Returns:
-        dict: Cleanup result
+        dict: Cleanup result, with the bytes removed and lines kept
     """
     try:
-        log_file_path = '/tmp/crm_report_log.txt'
+        log_file_path = REPORT_LOG_PATH
         
         if not os.path.exists(log_file_path):
             return {'success': True, 'message': 'No log file to clean'}
         
-        # Read all lines
-        with open(log_file_path, 'r') as f:
-            lines = f.readlines()
-        
-        # Keep only last 500 lines if file is larger
-        if len(lines) > 500:
-            with open(log_file_path, 'w') as f:
-                f.writelines(lines[-500:])
+        with open(log_file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            tail_start, tail_lines = _tail_start(f, size, 500)
             
-            message = f"Cleaned up report log, kept last 500 lines (removed {len(lines) - 500} lines)"
-        else:
-            message = f"Report log is manageable size ({len(lines)} lines), no cleanup needed"
-        
-        print(message)
+            # Keep only last 500 lines if file is larger. The discarded
+            # prefix is reported in bytes; counting its lines would read it
+            if tail_start:
+                # Copy the tail out and swap it in atomically
+                tmp_file = log_file_path + '.tmp'
+                f.seek(tail_start)
+                with open(tmp_file, 'wb') as out:
+                    shutil.copyfileobj(f, out, TAIL_CHUNK_SIZE)
+                os.replace(tmp_file, log_file_path)
+                
+                message = f"Cleaned up report log, kept last 500 lines (removed {tail_start} bytes)"
+            else:
+                message = f"Report log is manageable size ({tail_lines} lines), no cleanup needed"
+        
+        logger.info(message)
         
         return {
             'success': True,
             'message': message,
-            'lines_before': len(lines),
-            'lines_after': min(len(lines), 500)
+            'bytes_removed': tail_start,
+            'lines_after': tail_lines
         }
         
     except Exception as exc:
         error_msg = f"Failed to cleanup reports: {str(exc)}"
-        print(error_msg)
+        logger.error(error_msg)
         
         return {
             'success': False,
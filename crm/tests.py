@@ -1,3 +1,497 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql_relay import to_global_id
+
+from crm import cron, logging_setup, tasks
+from crm import schema as crm_schema
+from crm.loaders import CustomerLoader
+from crm.models import Customer, Product, Order
+
+
+class GraphQLTestCase(TestCase):
+    """Posts queries to the real /graphql endpoint (view, middleware, schema)"""
+    
+    def execute(self, query, variables=None):
+        response = self.client.post(
+            '/graphql',
+            data=json.dumps({'query': query, 'variables': variables or {}}),
+            content_type='application/json'
+        )
+        return response.json()
+    
+    def query(self, query, variables=None):
+        content = self.execute(query, variables)
+        self.assertNotIn('errors', content, content.get('errors'))
+        return content['data']
+    
+    def make_order(self, customer, products, total_amount):
+        order = Order.objects.create(customer=customer, total_amount=total_amount)
+        order.products.set(products)
+        return order
+
+
+class OrderFilterTests(GraphQLTestCase):
+
+    FILTER_ORDERS = '''
+        query ($name: String!, $gte: Decimal) {
+            filterOrders(filter: {customerName: $name}, totalAmountGte: $gte) {
+                edges { node { totalAmount customer { name } } }
+            }
+        }
+    '''
+    
+    def setUp(self):
+        self.john = Customer.objects.create(name='John Doe', email='john@example.com')
+        self.jane = Customer.objects.create(name='Jane Roe', email='jane@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price=Decimal('149.99'), stock=5)
+        self.mouse = Product.objects.create(name='Mouse', price=Decimal('15.00'), stock=5)
+        self.make_order(self.john, [self.laptop, self.mouse], Decimal('164.99'))
+        self.make_order(self.jane, [self.laptop, self.mouse], Decimal('164.99'))
+        self.make_order(self.jane, [self.mouse], Decimal('15.00'))
+    
+    def filter_orders(self, name, gte=None):
+        data = self.query(self.FILTER_ORDERS, {'name': name, 'gte': gte})
+        return [edge['node'] for edge in data['filterOrders']['edges']]
+    
+    def test_same_filter_values_on_different_base_querysets(self):
+        # The connection's own filters run on a queryset already narrowed by
+        # `filter:`; results for John must not leak into Jane's query
+        john = self.filter_orders('john', '100')
+        jane = self.filter_orders('jane', '100')
+        
+        self.assertEqual([node['customer']['name'] for node in john], ['John Doe'])
+        self.assertEqual([node['customer']['name'] for node in jane], ['Jane Roe'])
+        self.assertEqual(jane[0]['totalAmount'], '164.99')
+    
+    def test_writes_are_visible_to_the_next_filter_query(self):
+        self.assertEqual(len(self.filter_orders('jane', '100')), 1)
+        
+        self.query('''
+            mutation ($customerId: ID!, $productIds: [ID]!) {
+                createOrder(input: {customerId: $customerId, productIds: $productIds}) { success }
+            }
+        ''', {'customerId': self.jane.pk, 'productIds': [self.laptop.pk]})
+        self.assertEqual(len(self.filter_orders('jane', '100')), 2)
+        
+        Order.objects.filter(customer=self.jane).update(total_amount=Decimal('1.00'))
+        self.assertEqual(self.filter_orders('jane', '100'), [])
+
+
+
+class CaseInsensitiveSearchTests(GraphQLTestCase):
+    
+    def setUp(self):
+        self.zoe = Customer.objects.create(name='Zoë Straße', email='zoe@example.com')
+        Customer.objects.create(name='100% Real', email='real@example.com')
+        product = Product.objects.create(name='Straße Map', price=Decimal('5.00'), stock=1)
+        self.make_order(self.zoe, [product], Decimal('5.00'))
+    
+    def customer_names(self, name):
+        data = self.query(
+            'query ($name: String) { allCustomers(name: $name) { edges { node { name } } } }',
+            {'name': name}
+        )
+        return [edge['node']['name'] for edge in data['allCustomers']['edges']]
+    
+    def test_non_ascii_values_match_the_stored_uppercase_column(self):
+        self.assertEqual(self.customer_names('zoë'), ['Zoë Straße'])
+        self.assertEqual(self.customer_names('straße'), ['Zoë Straße'])
+    
+    def test_like_wildcards_in_the_value_are_literal(self):
+        self.assertEqual(self.customer_names('0%'), ['100% Real'])
+        self.assertEqual(self.customer_names('_'), [])
+    
+    def test_order_product_name_search(self):
+        data = self.query('query { allOrders(productName: "straße") { edges { node { customer { name } } } } }')
+        
+        self.assertEqual(len(data['allOrders']['edges']), 1)
+
+
+class OrderTotalTests(GraphQLTestCase):
+    
+    CREATE_ORDER = '''
+        mutation ($customerId: ID!, $productIds: [ID]!) {
+            createOrder(input: {customerId: $customerId, productIds: $productIds}) {
+                success
+                message
+                order { totalAmount products { edges { node { name } } } }
+            }
+        }
+    '''
+    
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price=Decimal('999.99'), stock=5)
+        self.mouse = Product.objects.create(name='Mouse', price=Decimal('25.50'), stock=5)
+    
+    def create_order(self, product_ids):
+        return self.query(
+            self.CREATE_ORDER,
+            {'customerId': self.customer.pk, 'productIds': product_ids}
+        )['createOrder']
+    
+    def test_create_order_stores_the_sum_of_product_prices(self):
+        result = self.create_order([self.laptop.pk, self.mouse.pk])
+        
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['order']['totalAmount'], '1025.49')
+        self.assertEqual(sorted(edge['node']['name'] for edge in result['order']['products']['edges']), ['Laptop', 'Mouse'])
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, Decimal('1025.49'))
+        self.assertEqual(order.products.count(), 2)
+    
+    def test_create_order_rejects_unknown_products(self):
+        result = self.create_order([self.laptop.pk, 0])
+        
+        self.assertFalse(result['success'])
+        self.assertFalse(Order.objects.exists())
+    
+    def test_calculate_total(self):
+        order = self.make_order(self.customer, [self.laptop, self.mouse], Decimal('0.00'))
+        
+        self.assertEqual(order.calculate_total(), Decimal('1025.49'))
+        self.assertEqual(order.total_amount, Decimal('1025.49'))
+    
+    def test_calculate_total_without_products(self):
+        order = self.make_order(self.customer, [], Decimal('5.00'))
+        
+        self.assertEqual(order.calculate_total(), Decimal('0.00'))
+
+
+class OrderKeysetPaginationTests(GraphQLTestCase):
+    
+    ORDERS = '''
+        query ($first: Int, $after: String) {
+            orders(first: $first, after: $after) {
+                edges { cursor node { id } }
+                pageInfo { hasNextPage hasPreviousPage endCursor }
+            }
+        }
+    '''
+    
+    def setUp(self):
+        customer = Customer.objects.create(name='Bob', email='bob@example.com')
+        now = timezone.now()
+        # Two orders share a timestamp so the id tie-breaker is exercised
+        dates = [now, now - timedelta(days=1), now - timedelta(days=1), now - timedelta(days=2), now - timedelta(days=3)]
+        orders = [
+            Order.objects.create(customer=customer, order_date=order_date, total_amount=Decimal('1.00'))
+            for order_date in dates
+        ]
+        self.expected_ids = [
+            to_global_id('OrderType', order.pk)
+            for order in sorted(orders, key=lambda order: (order.order_date, order.pk), reverse=True)
+        ]
+    
+    def page(self, first, after=None):
+        return self.query(self.ORDERS, {'first': first, 'after': after})['orders']
+    
+    def test_cursor_round_trip(self):
+        seen = []
+        after = None
+        pages = 0
+        while True:
+            page = self.page(2, after)
+            pages += 1
+            seen.extend(edge['node']['id'] for edge in page['edges'])
+            self.assertEqual(page['pageInfo']['hasPreviousPage'], after is not None)
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+            self.assertEqual(after, page['edges'][-1]['cursor'])
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.expected_ids)
+    
+    def test_last_page_has_no_next_page(self):
+        page = self.page(5)
+        
+        self.assertEqual(len(page['edges']), 5)
+        self.assertFalse(page['pageInfo']['hasNextPage'])
+    
+    def test_first_zero_returns_no_edges(self):
+        page = self.page(0)
+        
+        self.assertEqual(page['edges'], [])
+        self.assertTrue(page['pageInfo']['hasNextPage'])
+    
+    def test_negative_first_is_rejected(self):
+        content = self.execute(self.ORDERS, {'first': -1})
+        
+        self.assertIn('non-negative', content['errors'][0]['message'])
+    
+    def test_backward_pagination_is_rejected(self):
+        content = self.execute('query { orders(last: 2) { edges { node { id } } } }')
+        
+        self.assertIn('keyset-paginated', content['errors'][0]['message'])
+    
+    def test_invalid_cursor_is_rejected(self):
+        content = self.execute(self.ORDERS, {'first': 2, 'after': 'not-a-cursor'})
+        
+        self.assertIn('Invalid cursor', content['errors'][0]['message'])
+
+
+class ReportDataTests(TestCase):
+    
+    def setUp(self):
+        alice = Customer.objects.create(name='Alice', email='alice@example.com')
+        Customer.objects.create(name='Bob', email='bob@example.com')
+        Order.objects.create(customer=alice, total_amount=Decimal('10.25'))
+        Order.objects.create(customer=alice, total_amount=Decimal('4.50'))
+    
+    def test_graphql_and_database_paths_agree(self):
+        expected = {'total_customers': 2, 'total_orders': 2, 'total_revenue': 14.75}
+        
+        self.assertEqual(tasks._fetch_report_via_graphql(), expected)
+        with self.assertNumQueries(1):
+            self.assertEqual(tasks._fetch_report_via_database(), expected)
+    
+    def test_database_path_counts_customers_without_orders_and_empty_tables(self):
+        Order.objects.all().delete()
+        
+        self.assertEqual(
+            tasks._fetch_report_via_database(),
+            {'total_customers': 2, 'total_orders': 0, 'total_revenue': 0.0}
+        )
+        Customer.objects.all().delete()
+        self.assertEqual(
+            tasks._fetch_report_via_database(),
+            {'total_customers': 0, 'total_orders': 0, 'total_revenue': 0.0}
+        )
+    
+    def test_report_reflects_new_orders_immediately(self):
+        tasks._fetch_report_via_graphql()
+        Order.objects.create(customer=Customer.objects.first(), total_amount=Decimal('1.00'))
+        
+        self.assertEqual(tasks._fetch_report_via_graphql()['total_orders'], 3)
+
+
+class ReportStatsQueryTests(GraphQLTestCase):
+    
+    def test_total_revenue_is_a_two_place_decimal(self):
+        customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        for amount in ('999.99', '1190.48', '0.10'):
+            Order.objects.create(customer=customer, total_amount=Decimal(amount))
+        
+        stats = self.query('query { reportStats { totalCustomers totalOrders totalRevenue } }')['reportStats']
+        
+        self.assertEqual(stats, {'totalCustomers': 1, 'totalOrders': 3, 'totalRevenue': '2190.57'})
+    
+    def test_total_revenue_without_orders(self):
+        stats = self.query('query { reportStats { totalRevenue } }')['reportStats']
+        
+        self.assertEqual(stats['totalRevenue'], '0.00')
+
+
+class CronDocumentTests(TestCase):
+    
+    def test_cron_documents_validate_against_the_schema(self):
+        self.assertEqual(cron.HELLO_DOCUMENT.definitions[0].operation.value, 'query')
+        self.assertEqual(cron.UPDATE_LOW_STOCK_DOCUMENT.definitions[0].operation.value, 'mutation')
+    
+    def test_invalid_document_is_rejected_at_parse_time(self):
+        with self.assertRaisesRegex(ValueError, 'noSuchField'):
+            cron._parse_document('query { noSuchField }')
+
+
+class ReportLogTailTests(TestCase):
+    """The backwards tail scan must agree with readlines()-based trimming"""
+    
+    CASES = [
+        b'',
+        b'\n',
+        b'only line',
+        b'only line\n',
+        b'a\nb\nc',
+        b'a\nb\nc\n',
+        b'a\n\n\nb\n',
+        b''.join(b'line %d\n' % i for i in range(40)),
+        b''.join(b'line %d\n' % i for i in range(40)) + b'partial',
+    ]
+    
+    def write_temp(self, content):
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as f:
+            f.write(content)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        return path
+    
+    def check_tail(self, content, keep):
+        lines = content.splitlines(keepends=True)
+        path = self.write_temp(content)
+        with open(path, 'rb') as f:
+            start, tail_lines = tasks._tail_start(f, len(content), keep)
+            if len(lines) > keep:
+                self.assertEqual(content[start:], b''.join(lines[-keep:]))
+                self.assertEqual(tail_lines, keep)
+            else:
+                self.assertEqual(start, 0)
+                self.assertEqual(tail_lines, len(lines))
+    
+    def test_tail_start_matches_readlines(self):
+        for content in self.CASES:
+            for keep in (1, 2, 3, 10, 39, 40, 41):
+                with self.subTest(content=content[:20], keep=keep):
+                    self.check_tail(content, keep)
+    
+    def test_tail_start_across_chunk_boundaries(self):
+        with mock.patch.object(tasks, 'TAIL_CHUNK_SIZE', 7):
+            for content in self.CASES:
+                for keep in (1, 3, 10, 39):
+                    with self.subTest(content=content[:20], keep=keep):
+                        self.check_tail(content, keep)
+    
+    def test_cleanup_keeps_the_last_500_lines(self):
+        lines = [b'report %d\n' % i for i in range(520)]
+        path = self.write_temp(b''.join(lines))
+        
+        with mock.patch.object(tasks, 'REPORT_LOG_PATH', path):
+            result = tasks.cleanup_old_reports.run()
+        
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['lines_after'], 500)
+        self.assertEqual(result['bytes_removed'], len(b''.join(lines[:20])))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b''.join(lines[-500:]))
+    
+    def test_cleanup_leaves_small_logs_alone(self):
+        content = b'report 1\nreport 2'
+        path = self.write_temp(content)
+        
+        with mock.patch.object(tasks, 'REPORT_LOG_PATH', path):
+            result = tasks.cleanup_old_reports.run()
+        
+        self.assertEqual((result['bytes_removed'], result['lines_after']), (0, 2))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+
+
+class TaskRoutingTests(TestCase):
+    
+    def test_cleanup_runs_on_the_io_cleanup_queue(self):
+        from crm.celery import app
+        
+        self.assertEqual(app.conf.task_routes['crm.tasks.cleanup_old_reports'], {'queue': 'io_cleanup'})
+        self.assertIn('io_cleanup', app.conf.task_queues)
+        route = app.amqp.router.route({}, tasks.cleanup_old_reports.name)
+        self.assertEqual(route['queue'].name, 'io_cleanup')
+
+
+
+class LogSetupTests(TestCase):
+    
+    def test_queued_loggers_still_propagate_to_crm_handlers(self):
+        with self.assertLogs('crm', level='INFO') as logs:
+            logging_setup.heartbeat_logger.info('CRM is alive')
+            logging_setup.report_logger.info('Report: 0 customers\n')
+        
+        self.assertEqual(
+            [record.name for record in logs.records],
+            ['crm.heartbeat', 'crm.report']
+        )
+
+
+class CustomerLoaderTests(GraphQLTestCase):
+    
+    ORDERS_WITH_CUSTOMERS = 'query { orders(first: 50) { edges { node { totalAmount customer { name email } } } } }'
+    
+    def add_orders(self, count):
+        start = Customer.objects.count()
+        for i in range(start, start + count):
+            customer = Customer.objects.create(name=f'Customer {i}', email=f'customer{i}@example.com')
+            Order.objects.create(customer=customer, total_amount=Decimal('1.00'))
+    
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.query(self.ORDERS_WITH_CUSTOMERS)
+        return len(context.captured_queries)
+    
+    def test_order_customers_do_not_add_a_query_per_order(self):
+        self.add_orders(2)
+        baseline = self.count_queries()
+        self.add_orders(8)
+        
+        self.assertEqual(self.count_queries(), baseline)
+    
+    def test_batch_load_keeps_key_order_in_one_query(self):
+        alice = Customer.objects.create(name='Alice', email='alice@example.com')
+        bob = Customer.objects.create(name='Bob', email='bob@example.com')
+        
+        with self.assertNumQueries(1):
+            loaded = CustomerLoader().batch_load_fn([bob.pk, 0, alice.pk])
+        
+        self.assertEqual(loaded, [bob, None, alice])
+
+
+class CustomerAndOrderInsertTests(GraphQLTestCase):
+    
+    BULK_CREATE = '''
+        mutation ($input: [CustomerInput]!) {
+            bulkCreateCustomers(input: $input) { successCount errors customers { name email phone } }
+        }
+    '''
+    
+    def bulk_create(self, customers):
+        return self.query(self.BULK_CREATE, {'input': customers})['bulkCreateCustomers']
+    
+    def test_bulk_create_skips_existing_and_repeated_emails(self):
+        Customer.objects.create(name='Existing', email='taken@example.com')
+        
+        result = self.bulk_create([
+            {'name': 'Ann', 'email': 'ann@example.com', 'phone': '+1234567890'},
+            {'name': 'Taken', 'email': 'taken@example.com'},
+            {'name': 'Ann Again', 'email': 'ann@example.com'},
+            {'name': 'Ben', 'email': 'ben@example.com'},
+        ])
+        
+        self.assertEqual(result['successCount'], 2)
+        self.assertEqual(len(result['errors']), 2)
+        self.assertEqual(
+            sorted(Customer.objects.values_list('email', flat=True)),
+            ['ann@example.com', 'ben@example.com', 'taken@example.com']
+        )
+    
+    @skipUnless(connection.vendor == 'postgresql', 'COPY is PostgreSQL only')
+    def test_bulk_create_through_copy(self):
+        customers = [
+            {'name': f'Copy {i}', 'email': f'copy{i}@example.com', 'phone': '+1234567890' if i % 2 else None}
+            for i in range(5)
+        ]
+        
+        with mock.patch.object(crm_schema, 'COPY_THRESHOLD', 1):
+            result = self.bulk_create(customers)
+        
+        self.assertEqual(result['successCount'], 5)
+        self.assertEqual(
+            sorted(Customer.objects.values_list('email', 'phone')),
+            sorted((c['email'], c['phone']) for c in customers)
+        )
+    
+    @skipUnless(connection.vendor == 'postgresql', 'data-modifying CTEs are PostgreSQL only')
+    @override_settings(CRM_SINGLE_STATEMENT_ORDER_INSERT=True)
+    def test_create_order_in_a_single_statement(self):
+        customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        products = [
+            Product.objects.create(name='Laptop', price=Decimal('999.99'), stock=5),
+            Product.objects.create(name='Mouse', price=Decimal('25.50'), stock=5),
+        ]
+        
+        result = self.query(OrderTotalTests.CREATE_ORDER, {
+            'customerId': customer.pk,
+            'productIds': [product.pk for product in products],
+        })['createOrder']
+        
+        self.assertTrue(result['success'], result['message'])
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, Decimal('1025.49'))
+        self.assertEqual(set(order.products.all()), set(products))
@@ -1,16 +1,3 @@
-import graphene
-from alx_backend_graphql_crm.alx_backend_graphql_crm.schema import Query as CRMQuery, Mutation as CRMMutation
-
-
-class Query(CRMQuery, graphene.ObjectType):
-    hello = graphene.String()
-    
-    def resolve_hello(self, info):
-        return "Hello, GraphQL!"
-
-
-class Mutation(CRMMutation, graphene.ObjectType):
-    pass
-
-
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+# The project schema lives in alx_backend_graphql_crm.schema; re-export it
+# so "schema.schema" resolves without building a second graphene.Schema
+from alx_backend_graphql_crm.schema import Query, Mutation, schema
@@ -17,6 +17,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
 django.setup()
 
+from django.db import transaction
+
 from crm.models import Customer, Product, Order
 
 
@@ -30,17 +32,22 @@ def seed_customers():
         {"name": "Charlie Brown", "email": "charlie@example.com", "phone": "987-654-3210"},
     ]
     
+    # One lookup for the existing emails and one INSERT for the rest
+    existing_emails = set(
+        Customer.objects.filter(
+            email__in=[customer_data["email"] for customer_data in customers_data]
+        ).values_list('email', flat=True)
+    )
+    
     created_customers = []
     for customer_data in customers_data:
-        customer, created = Customer.objects.get_or_create(
-            email=customer_data["email"],
-            defaults=customer_data
-        )
-        if created:
-            created_customers.append(customer)
-            print(f"Created customer: {customer.name}")
+        if customer_data["email"] in existing_emails:
+            print(f"Customer already exists: {customer_data['name']}")
         else:
-            print(f"Customer already exists: {customer.name}")
+            created_customers.append(Customer(**customer_data))
+            print(f"Created customer: {customer_data['name']}")
+    
+    Customer.objects.bulk_create(created_customers, ignore_conflicts=True)
     
     return created_customers
 
@@ -56,17 +63,22 @@ def seed_products():
         {"name": "Webcam", "price": Decimal("65.00"), "stock": 20},
     ]
     
+    # One lookup for the existing names and one INSERT for the rest
+    existing_names = set(
+        Product.objects.filter(
+            name__in=[product_data["name"] for product_data in products_data]
+        ).values_list('name', flat=True)
+    )
+    
     created_products = []
     for product_data in products_data:
-        product, created = Product.objects.get_or_create(
-            name=product_data["name"],
-            defaults=product_data
-        )
-        if created:
-            created_products.append(product)
-            print(f"Created product: {product.name} - ${product.price}")
+        if product_data["name"] in existing_names:
+            print(f"Product already exists: {product_data['name']}")
         else:
-            print(f"Product already exists: {product.name}")
+            created_products.append(Product(**product_data))
+            print(f"Created product: {product_data['name']} - ${product_data['price']}")
+    
+    Product.objects.bulk_create(created_products, ignore_conflicts=True)
     
     return created_products
 
@@ -82,27 +94,36 @@ def seed_orders():
     
     # Create some sample orders
     created_orders = []
+    # Order-product links are collected and inserted together at the end
+    through = Order.products.through
+    order_links = []
     
     # Order 1: John buys laptop and mouse
-    if customers.filter(name="John Doe").exists() and products.filter(name__in=["Laptop", "Mouse"]).exists():
-        john = customers.get(name="John Doe")
-        order1 = Order.objects.create(customer=john)
-        order1.products.set(products.filter(name__in=["Laptop", "Mouse"]))
-        order1.calculate_total()
-        order1.save()
+    john = customers.filter(name="John Doe").only('id', 'name').first()
+    order_products = list(products.filter(name__in=["Laptop", "Mouse"]).only('id', 'price'))
+    if john and order_products:
+        order1 = Order.objects.create(
+            customer=john,
+            total_amount=sum(product.price for product in order_products)
+        )
+        order_links.extend(through(order_id=order1.id, product_id=product.id) for product in order_products)
         created_orders.append(order1)
         print(f"Created order for {john.name}: ${order1.total_amount}")
     
     # Order 2: Jane buys keyboard and headphones
-    if customers.filter(name="Jane Smith").exists() and products.filter(name__in=["Keyboard", "Headphones"]).exists():
-        jane = customers.get(name="Jane Smith")
-        order2 = Order.objects.create(customer=jane)
-        order2.products.set(products.filter(name__in=["Keyboard", "Headphones"]))
-        order2.calculate_total()
-        order2.save()
+    jane = customers.filter(name="Jane Smith").only('id', 'name').first()
+    order_products = list(products.filter(name__in=["Keyboard", "Headphones"]).only('id', 'price'))
+    if jane and order_products:
+        order2 = Order.objects.create(
+            customer=jane,
+            total_amount=sum(product.price for product in order_products)
+        )
+        order_links.extend(through(order_id=order2.id, product_id=product.id) for product in order_products)
         created_orders.append(order2)
         print(f"Created order for {jane.name}: ${order2.total_amount}")
     
+    through.objects.bulk_create(order_links)
+    
     return created_orders
 
 
@@ -110,14 +131,16 @@ def main():
     """Main seeding function"""
     print("Starting database seeding...")
     
-    print("\n--- Seeding Customers ---")
-    customers = seed_customers()
-    
-    print("\n--- Seeding Products ---")
-    products = seed_products()
-    
-    print("\n--- Seeding Orders ---")
-    orders = seed_orders()
+    # Seed everything in one transaction instead of committing every INSERT
+    with transaction.atomic():
+        print("\n--- Seeding Customers ---")
+        customers = seed_customers()
+        
+        print("\n--- Seeding Products ---")
+        products = seed_products()
+        
+        print("\n--- Seeding Orders ---")
+        orders = seed_orders()
     
     print(f"\n--- Seeding Complete ---")
     print(f"Created {len(customers)} new customers")